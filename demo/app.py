@@ -1,11 +1,13 @@
 from neural_search import NeuralSearch
-from neural_search.config import TEMPLATE_DIR
+from neural_search.admission import Deadline, Overloaded
+from neural_search.config import TEMPLATE_DIR, request_budget
 
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Request, Form, Query
+from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from urllib.parse import quote_plus, unquote_plus
 from fastapi.exceptions import HTTPException
+from typing import Optional
 
 import uvicorn
 
@@ -15,13 +17,44 @@ templates = Jinja2Templates(directory=TEMPLATE_DIR)
 app = FastAPI()
 
 
+def overloaded_response(request: Request, exc: Overloaded):
+    if request.url.path.startswith("/api/"):
+        return JSONResponse({"error": str(exc)}, status_code=503)
+
+    return templates.TemplateResponse(
+        "error.html",
+        {
+            "request": request,
+            "error_msg": "the server is too busy right now, please try again shortly",
+        },
+        status_code=503,
+    )
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    # The budget starts when the request arrives, so the time spent waiting for a
+    # worker thread counts towards it
+    request.state.deadline = Deadline(request_budget)
+
+    if request.url.path == "/api/admission_stats":
+        return await call_next(request)
+
+    try:
+        with ns.admission.pending_request():
+            return await call_next(request)
+    except Overloaded as exc:
+        return overloaded_response(request, exc)
+
+
 @app.get("/search/{query}")
 def search_movies(query: str, request: Request):
+    deadline = ns.admission.admit(request.state.deadline)
     query = unquote_plus(query)
 
     movie_info = []
 
-    movie_titles = ns.search_movies(query)
+    movie_titles = ns.search_movies(query, deadline)
 
     for movie_title in movie_titles:
         description = ns.get_movie_overview(movie_title)
@@ -44,17 +77,44 @@ def submit(query: str = Form(...)):
 
 
 @app.get("/api/similar_plot_movies/")
-def search_similar_plot_movies(title: str):
-    return {"result": ns.recommend_movies(title, "tfidf")}
+def search_similar_plot_movies(title: str, request: Request):
+    deadline = ns.admission.admit(request.state.deadline)
+    return {"result": ns.recommend_movies(title, "tfidf", deadline)}
 
 
 @app.get("/api/similar_metadata_movies")
-def search_similar_metadata_movies(title: str):
-    return {"result": ns.recommend_movies(title, "count")}
+def search_similar_metadata_movies(title: str, request: Request):
+    deadline = ns.admission.admit(request.state.deadline)
+    return {"result": ns.recommend_movies(title, "count", deadline)}
+
+
+@app.get("/api/similar_blended_movies")
+def search_similar_blended_movies(
+    title: str,
+    request: Request,
+    plot_weight: Optional[float] = Query(None, ge=0),
+    metadata_weight: Optional[float] = Query(None, ge=0),
+    title_weight: Optional[float] = Query(None, ge=0),
+):
+    weights = {"plot": plot_weight, "metadata": metadata_weight, "title": title_weight}
+    weights = {space: weight for space, weight in weights.items() if weight is not None}
+    deadline = ns.admission.admit(request.state.deadline)
+    try:
+        result = ns.recommend_movies_blended(title, weights, deadline=deadline)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"result": result}
+
+
+@app.get("/api/admission_stats")
+def admission_stats():
+    return ns.admission.stats()
 
 
 @app.get("/movie/{movie_title}")
 def movie_page(movie_title: str, request: Request):
+    deadline = ns.admission.admit(request.state.deadline)
+
     if not ns.movie_exists(movie_title):
         return templates.TemplateResponse(
             "error.html",
@@ -67,8 +127,9 @@ def movie_page(movie_title: str, request: Request):
 
     movie_desc = ns.get_movie_overview(movie_title)
     genres = ns.get_movie_genres(movie_title)
-    similar_plot_movies = ns.recommend_movies(movie_title, "tfidf")
-    similar_metadata_movies = ns.recommend_movies(movie_title, "count")
+    similar_metadata_movies, similar_plot_movies = ns.recommend_movie_lists(
+        movie_title, deadline
+    )
 
     if not similar_plot_movies:
         similar_plot_movies = []
@@ -100,6 +161,11 @@ async def not_found_exception_handler(request: Request, exc: HTTPException):
     )
 
 
+@app.exception_handler(Overloaded)
+async def overloaded_exception_handler(request: Request, exc: Overloaded):
+    return overloaded_response(request, exc)
+
+
 @app.get("/")
 def homepage(request: Request):
     movie_titles = ns.get_random_movie_titles()
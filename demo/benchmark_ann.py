@@ -0,0 +1,76 @@
+from neural_search.ann import IVFPQIndex
+from neural_search.linalg import normalize_rows
+from neural_search.config import get_model
+from neural_search.metric import load_title_vectors
+from neural_search.prepare_data import load_movie_data
+
+import argparse
+import time
+import numpy as np
+
+
+def recall_at_k(approximate: np.ndarray, exact: np.ndarray) -> float:
+    hits = [len(set(a) & set(e)) for a, e in zip(approximate, exact)]
+    return sum(hits) / exact.size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares the IVF-PQ index against exact search on the title vectors."
+    )
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--rerank-factor", type=int, default=10)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    df = load_movie_data()
+
+    print("Embedding movie titles...")
+    vectors = normalize_rows(load_title_vectors(get_model(), df["title"]))
+
+    rng = np.random.default_rng(0)
+    n_queries = min(args.queries, vectors.shape[0])
+    queries = vectors[rng.choice(vectors.shape[0], n_queries, replace=False)]
+
+    print("Building IVF-PQ index...")
+    begin = time.perf_counter()
+    index = IVFPQIndex(vectors.shape[1], nlist=args.nlist, m=args.pq_m)
+    index.train(vectors)
+    for start in range(0, vectors.shape[0], args.batch_size):
+        index.add(vectors[start : start + args.batch_size])
+    build_time = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    scores = queries @ vectors.T
+    exact = np.argsort(-scores, axis=1, kind="stable")[:, : args.k]
+    exact_time = time.perf_counter() - begin
+
+    print(f"Movies: {vectors.shape[0]}, dimensions: {vectors.shape[1]}")
+    print(f"Build time: {build_time:.2f}s")
+    print(
+        f"Memory: {index.nbytes / 2**20:.1f} MiB index, "
+        f"{vectors.nbytes / 2**20:.1f} MiB exact vectors"
+    )
+    print(f"Exact: {n_queries / exact_time:.0f} QPS")
+
+    for rerank in (False, True):
+        for nprobe in args.nprobe:
+            begin = time.perf_counter()
+            ids, _ = index.search(
+                queries,
+                k=args.k,
+                nprobe=nprobe,
+                rerank_vectors=vectors if rerank else None,
+                rerank_factor=args.rerank_factor,
+            )
+            elapsed = time.perf_counter() - begin
+
+            print(
+                f"IVF-PQ nprobe={nprobe:<3} rerank={str(rerank):<5}: "
+                f"{n_queries / elapsed:.0f} QPS, "
+                f"recall@{args.k} {recall_at_k(ids, exact):.3f}"
+            )
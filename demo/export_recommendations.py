@@ -0,0 +1,64 @@
+from neural_search import NeuralSearch
+from neural_search.batch import export_space, write_recommendations
+
+import argparse
+import os
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Exports the top-k similar movies of every movie in all vector spaces."
+    )
+    parser.add_argument("--output", default="recommendations.npz")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--spaces",
+        nargs="+",
+        choices=["plot", "metadata", "title"],
+        default=["plot", "metadata", "title"],
+    )
+    args = parser.parse_args()
+
+    # Checkpoints are only valid for the same k and block size, so these are
+    # part of the directory name and changing them starts a fresh export
+    checkpoint_dir = os.path.join(
+        args.output + ".parts", f"k{args.k}_b{args.block_size}"
+    )
+
+    ns = NeuralSearch()
+    space_vectors = ns.space_vectors
+
+    reports = []
+    for space in args.spaces:
+        print(f"Computing top-{args.k} {space} neighbours...")
+        reports.append(
+            export_space(
+                space,
+                space_vectors[space],
+                checkpoint_dir,
+                k=args.k,
+                block_size=args.block_size,
+                workers=args.workers,
+            )
+        )
+
+    print(f"Writing recommendations to {args.output}...")
+    write_recommendations(
+        args.output, ns.titles, checkpoint_dir, args.spaces, args.block_size
+    )
+
+    print("Throughput report:")
+    for report in reports:
+        computed = report["movies"] * report["blocks_computed"] / max(
+            report["blocks_computed"] + report["blocks_resumed"], 1
+        )
+        rate = computed / report["seconds"] if report["seconds"] > 0 else 0.0
+        print(
+            f"  {report['space']}: {report['movies']} movies, "
+            f"{report['blocks_computed']} blocks computed, "
+            f"{report['blocks_resumed']} resumed, "
+            f"{report['seconds']:.1f}s, {rate:.0f} movies/s"
+        )
+
+    print("Successfully exported all recommendations!")
@@ -0,0 +1,81 @@
+from neural_search import NeuralSearch
+from neural_search.admission import Deadline, Overloaded
+from neural_search.config import (
+    request_budget,
+    titles_coll_name,
+    tfidf_coll_name,
+    metadata_coll_name,
+)
+from neural_search.vector_store import StubVectorStore
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import random
+import time
+import numpy as np
+
+
+def simulate_request(ns: NeuralSearch, query: str, movie_title: str) -> float:
+    """
+    Sends either a search or a movie page request through the same admission
+    control as demo/app.py and returns the latency of the request in seconds.
+
+    """
+    begin = time.perf_counter()
+    deadline = Deadline(request_budget)
+
+    try:
+        with ns.admission.pending_request():
+            ns.admission.admit(deadline)
+            if random.random() < 0.5:
+                ns.search_movies(query, deadline)
+            else:
+                ns.recommend_movie_lists(movie_title, deadline)
+    except Overloaded:
+        pass
+
+    return time.perf_counter() - begin
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sends bursts of requests to NeuralSearch with a slowed stub backend."
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    store = StubVectorStore(args.delay)
+    ns = NeuralSearch(store=store)
+
+    titles = ns.titles
+    payload = [{"title": title} for title in titles]
+    space_vectors = ns.space_vectors
+    store.upload(titles_coll_name, space_vectors["title"], payload)
+    store.upload(tfidf_coll_name, space_vectors["plot"], payload)
+    store.upload(metadata_coll_name, space_vectors["metadata"], payload)
+
+    queries = [" ".join(random.choice(titles).split()[:2]) for _ in range(50)]
+
+    print(
+        f"Sending {args.requests} requests with {args.concurrency} concurrent clients "
+        f"and a search delay of {args.delay}s (budget {request_budget}s)..."
+    )
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(
+            executor.map(
+                lambda _: simulate_request(
+                    ns, random.choice(queries), random.choice(titles)
+                ),
+                range(args.requests),
+            )
+        )
+    elapsed = time.perf_counter() - begin
+
+    stats = ns.admission.stats()
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"Throughput: {args.requests / elapsed:.1f} requests/s")
+    print(f"Latency: p50 {p50:.3f}s, p95 {p95:.3f}s, p99 {p99:.3f}s")
+    print(f"Shed: {stats['shed']}, degraded: {stats['degraded']}")
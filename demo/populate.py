@@ -1,22 +1,20 @@
-from qdrant_client import QdrantClient
-
 from neural_search.config import (
     tfidf_coll_name,
     titles_coll_name,
     metadata_coll_name,
-    model,
+    get_model,
 )
 from neural_search.prepare_data import load_movie_data
-from neural_search.upload import upload_data, establish_conn
+from neural_search.vector_store import establish_store
 
 from neural_search.metric import (
     construct_tfidf_plot,
     construct_metadata_vectors,
-    construct_title_vectors,
+    load_title_vectors,
 )
 
 if __name__ == "__main__":
-    qdrant_client = establish_conn()
+    store = establish_store()
 
     df = load_movie_data()
 
@@ -27,30 +25,27 @@ if __name__ == "__main__":
     vectors_metadata, _ = construct_metadata_vectors(df)
 
     print("Embedding movie titles...")
-    vectors_title = construct_title_vectors(model, df["title"])
+    vectors_title = load_title_vectors(get_model(), df["title"])
 
-    print("Uploading embedded title vectors to Qdrant cluster...")
-    upload_data(
-        qdrant_client,
+    print("Uploading embedded title vectors to the vector store...")
+    store.upload(
         titles_coll_name,
         vectors_title,
         payload,
     )
 
-    print("Uploading plot-based `TF-IDF vectors to Qdrant cluster...")
-    upload_data(
-        qdrant_client,
+    print("Uploading plot-based `TF-IDF vectors to the vector store...")
+    store.upload(
         tfidf_coll_name,
         vectors_tfidf,
         payload,
     )
 
-    print("Uploading metadata based Count vectors to Qdrant cluster...")
-    upload_data(
-        qdrant_client,
+    print("Uploading metadata based Count vectors to the vector store...")
+    store.upload(
         metadata_coll_name,
         vectors_metadata,
         payload,
     )
 
-    print("Successfully uploaded all vectors to Qdrant!")
+    print("Successfully uploaded all vectors to the vector store!")
@@ -1,5 +1,13 @@
-from .config import *
-from .metric import *
-from .neural_search import *
-from .prepare_data import *
-from .upload import *
\ No newline at end of file
+__all__ = ["NeuralSearch"]
+
+
+def __getattr__(name):
+    # NeuralSearch is imported lazily, so that lightweight modules such as
+    # neural_search.vector_store or neural_search.ann can be imported without
+    # pulling in pandas, scikit-learn or the ML model
+    if name == "NeuralSearch":
+        from neural_search.neural_search import NeuralSearch
+
+        return NeuralSearch
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,180 @@
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed because no slot became free before its deadline.
+
+    """
+
+
+class Deadline:
+    """
+    Latency budget of a single request, created when the request arrives and passed
+    along to every NeuralSearch call made for it.
+
+    """
+
+    def __init__(self, budget: float):
+        self._expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(self._expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def is_near(self, margin: float) -> bool:
+        """
+        Checks if less than margin seconds are left, i.e. there is likely not enough
+        time left for another expensive step.
+
+        """
+        return self.remaining() <= margin
+
+
+class AdmissionController:
+    """
+    Bounds the number of pending requests as well as the concurrent model encodes
+    and vector searches, and counts the requests that were shed or served a degraded
+    response.
+
+    A call waits for a free slot at most until its deadline is near (or without limit
+    when there is no deadline), so that enough of the budget is left to serve a
+    degraded response instead of queueing indefinitely.
+
+    """
+
+    def __init__(
+        self,
+        max_encodes: int,
+        max_searches: int,
+        degrade_margin: float,
+        max_pending: Optional[int] = None,
+    ):
+        self._slots = {
+            "encode": threading.BoundedSemaphore(max_encodes),
+            "search": threading.BoundedSemaphore(max_searches),
+        }
+        self._degrade_margin = degrade_margin
+        self._max_pending = max_pending
+        self._pending = 0
+
+        self._lock = threading.Lock()
+        self._counts = {"shed": 0, "degraded": 0}
+
+    def should_degrade(self, deadline: Optional[Deadline]) -> bool:
+        return deadline is not None and deadline.is_near(self._degrade_margin)
+
+    @contextmanager
+    def pending_request(self):
+        """
+        Counts a request as pending for the duration of the block. If max_pending
+        requests are already pending, the request is shed right away by raising
+        Overloaded, before it waits for a worker thread.
+
+        """
+        with self._lock:
+            admitted = self._max_pending is None or self._pending < self._max_pending
+            if admitted:
+                self._pending += 1
+            else:
+                self._counts["shed"] += 1
+
+        if not admitted:
+            raise Overloaded("Too many pending requests")
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def admit(self, deadline: Deadline) -> Deadline:
+        """
+        Sheds the request by raising Overloaded if most of its budget was already
+        used up, e.g. while waiting for a worker thread, and returns the deadline
+        otherwise.
+
+        """
+        if self.should_degrade(deadline):
+            self.record("shed")
+            raise Overloaded("The request waited too long before being processed")
+
+        return deadline
+
+    def try_acquire(self, kind: str, deadline: Optional[Deadline] = None) -> bool:
+        """
+        Waits for a free encode or search slot until the deadline is near, or
+        without limit when there is no deadline, and returns whether one was
+        acquired.
+
+        """
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline.remaining() - self._degrade_margin, 0.0)
+
+        return self._slots[kind].acquire(timeout=timeout)
+
+    def release(self, kind: str) -> None:
+        self._slots[kind].release()
+
+    @contextmanager
+    def slot(self, kind: str, deadline: Optional[Deadline] = None):
+        """
+        Holds an encode or search slot for the duration of the block and raises
+        Overloaded, counting the request as shed, if none is available in time.
+
+        """
+        if not self.try_acquire(kind, deadline):
+            self.record("shed")
+            raise Overloaded(f"No {kind} slot available before the deadline")
+
+        try:
+            yield
+        finally:
+            self.release(kind)
+
+    def record(self, outcome: str) -> None:
+        """
+        Counts a request as "shed" or "degraded".
+
+        """
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+class LRUCache:
+    """
+    Small thread-safe least recently used cache for search results, which degraded
+    responses can be served from.
+
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,367 @@
+import numpy as np
+
+from typing import List, Optional, Tuple
+
+from neural_search.linalg import normalize_rows
+
+
+def train_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    iterations: Optional[int] = 20,
+    seed: Optional[int] = 0,
+) -> np.ndarray:
+    """
+    Runs Lloyd's k-means on the given vectors and returns the cluster centroids.
+    Empty clusters are re-seeded with random vectors so that all n_clusters
+    centroids remain usable.
+
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)]
+
+    for _ in range(iterations):
+        assignment = assign_clusters(vectors, centroids)
+
+        counts = np.bincount(assignment, minlength=n_clusters)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        sums = np.zeros_like(centroids)
+        nonempty = counts > 0
+        sums[nonempty] = np.add.reduceat(vectors[order], starts[nonempty], axis=0)
+
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()))]
+        counts[empty] = 1
+
+        centroids = sums / counts[:, None]
+
+    return centroids.astype(np.float32)
+
+
+def assign_clusters(
+    vectors: np.ndarray, centroids: np.ndarray, batch_size: Optional[int] = 4096
+) -> np.ndarray:
+    """
+    Returns the index of the closest centroid, by euclidean distance, for every
+    vector. The vectors are processed in batches to bound the memory of the
+    distance matrix.
+
+    """
+    centroid_norms = (centroids**2).sum(axis=1)
+    assignment = np.empty(vectors.shape[0], dtype=np.int64)
+
+    for start in range(0, vectors.shape[0], batch_size):
+        batch = vectors[start : start + batch_size]
+        distances = centroid_norms - 2 * batch @ centroids.T
+        assignment[start : start + batch_size] = distances.argmin(axis=1)
+
+    return assignment
+
+
+class IVFPQIndex:
+    """
+    Approximate nearest neighbour index for cosine similarity, using an inverted file
+    (IVF) of nlist k-means clusters whose residuals are compressed with product
+    quantisation (PQ) into m bytes per vector.
+
+    A query only scans the nprobe clusters closest to it, and the inner products are
+    estimated from per-query lookup tables. Optionally, the best candidates are re-
+    ranked with the exact vectors, trading latency for recall.
+
+    Usage
+    -------
+    index = IVFPQIndex(dim=768)
+    index.train(sample)
+    for batch in batches:
+        index.add(batch)
+    index.save("titles.npz")
+
+    """
+
+    def __init__(self, dim: int, nlist: Optional[int] = 256, m: Optional[int] = 16):
+        self._dim = dim
+        self._nlist = nlist
+        self._m = m
+        # Vectors are zero-padded so that they split into m equally sized subspaces
+        self._padded_dim = -(-dim // m) * m
+
+        self._centroids = None
+        self._codebooks = None
+        self._list_ids = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._list_codes = [np.empty((0, m), dtype=np.uint8) for _ in range(nlist)]
+        self._ntotal = 0
+        self._next_id = 0
+
+    @property
+    def ntotal(self) -> int:
+        return self._ntotal
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the centroids, codebooks and inverted lists.
+
+        """
+        nbytes = self._centroids.nbytes + self._codebooks.nbytes
+        for ids, codes in zip(self._list_ids, self._list_codes):
+            nbytes += ids.nbytes + codes.nbytes
+        return nbytes
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+
+        vectors = normalize_rows(vectors)
+
+        if self._padded_dim != self._dim:
+            vectors = np.pad(vectors, ((0, 0), (0, self._padded_dim - self._dim)))
+
+        return vectors
+
+    def _subspaces(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(vectors.shape[0], self._m, -1)
+
+    def train(
+        self,
+        vectors: np.ndarray,
+        iterations: Optional[int] = 20,
+        max_samples: Optional[int] = 100000,
+        seed: Optional[int] = 0,
+    ) -> None:
+        """
+        Learns the IVF centroids and the PQ codebooks from (a sample of) the vectors.
+
+        """
+        vectors = self._prepare(vectors)
+
+        if vectors.shape[0] > max_samples:
+            rng = np.random.default_rng(seed)
+            vectors = vectors[rng.choice(vectors.shape[0], max_samples, replace=False)]
+
+        centroids = train_kmeans(vectors, self._nlist, iterations, seed)
+        # Keep nlist fixed even if there were fewer training vectors than clusters
+        if centroids.shape[0] < self._nlist:
+            centroids = np.resize(centroids, (self._nlist, self._padded_dim))
+        self._centroids = centroids
+
+        residuals = vectors - centroids[assign_clusters(vectors, centroids)]
+        residuals = self._subspaces(residuals)
+
+        # Up to 256 codes per subspace so that every code fits into a single byte
+        ksub = min(256, vectors.shape[0])
+        self._codebooks = np.stack(
+            [
+                train_kmeans(residuals[:, j], ksub, iterations, seed)
+                for j in range(self._m)
+            ]
+        )
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        residuals = self._subspaces(residuals)
+        codes = np.empty((residuals.shape[0], self._m), dtype=np.uint8)
+        for j in range(self._m):
+            codes[:, j] = assign_clusters(residuals[:, j], self._codebooks[j])
+        return codes
+
+    def add(self, vectors: np.ndarray, ids: Optional[List] = None) -> None:
+        """
+        Adds vectors to the trained index. It can be called repeatedly, e.g. for
+        every batch returned while embedding the catalog. The ids default to the
+        insertion order.
+
+        """
+        if not self.is_trained:
+            raise RuntimeError("The index must be trained before adding vectors")
+
+        vectors = self._prepare(vectors)
+        if vectors.shape[0] == 0:
+            return
+
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + vectors.shape[0])
+        ids = np.asarray(ids, dtype=np.int64)
+
+        assignment = assign_clusters(vectors, self._centroids)
+        codes = self._encode(vectors - self._centroids[assignment])
+
+        for cluster in np.unique(assignment):
+            members = assignment == cluster
+            self._list_ids[cluster] = np.concatenate(
+                [self._list_ids[cluster], ids[members]]
+            )
+            self._list_codes[cluster] = np.concatenate(
+                [self._list_codes[cluster], codes[members]]
+            )
+
+        self._ntotal += vectors.shape[0]
+        self._next_id = max(self._next_id, int(ids.max()) + 1)
+
+    def remove_ids(self, ids: List) -> int:
+        """
+        Removes the vectors with the given ids from the inverted lists, without
+        retraining the centroids or codebooks, and returns how many were removed.
+
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        removed = 0
+
+        for cluster in range(self._nlist):
+            keep = ~np.isin(self._list_ids[cluster], ids)
+            if keep.all():
+                continue
+            removed += int((~keep).sum())
+            self._list_ids[cluster] = self._list_ids[cluster][keep]
+            self._list_codes[cluster] = self._list_codes[cluster][keep]
+
+        self._ntotal -= removed
+        return removed
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        k: Optional[int] = 5,
+        nprobe: Optional[int] = 8,
+        rerank_vectors: Optional[np.ndarray] = None,
+        rerank_factor: Optional[int] = 10,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the ids and estimated cosine similarities of the k approximate nearest
+        neighbours of every query, best first. Rows with fewer than k results are
+        padded with id -1 and score -inf.
+
+        Parameters
+        -------
+        query_vectors: numpy.ndarray
+            One or more query vectors.
+
+        k: int, optional
+            Number of neighbours to return.
+
+        nprobe: int, optional
+            Number of clusters scanned per query. Higher values increase the recall
+            as well as the latency.
+
+        rerank_vectors: numpy.ndarray, optional
+            L2-normalised vectors indexed by id. When given, the k * rerank_factor
+            best candidates are re-scored exactly with these vectors.
+
+        rerank_factor: int, optional
+            Number of candidates re-ranked per returned neighbour.
+
+        Returns
+        -------
+        ids: numpy.ndarray
+            Ids of the neighbours, shape (number of queries, k).
+
+        scores: numpy.ndarray
+            Cosine similarities corresponding to the ids.
+
+        """
+        queries = self._prepare(query_vectors)
+        nprobe = min(nprobe, self._nlist)
+        n_candidates = k if rerank_vectors is None else k * rerank_factor
+
+        result_ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        result_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+
+        coarse_scores = queries @ self._centroids.T
+
+        # Vectors were assigned to their closest centroid by euclidean distance, so
+        # the lists are probed by -||q - c||^2 = 2 q . c - ||c||^2 - ||q||^2 as well
+        probe_scores = 2 * coarse_scores - (self._centroids**2).sum(axis=1)
+        probes = np.argpartition(-probe_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        for i, query in enumerate(queries):
+            # For inner products the lookup tables don't depend on the cluster, as
+            # q . (c + r) = q . c + q . r
+            tables = np.einsum(
+                "jd,jkd->jk", self._subspaces(query[None])[0], self._codebooks
+            )
+
+            ids = []
+            scores = []
+            for cluster in probes[i]:
+                codes = self._list_codes[cluster]
+                if codes.shape[0] == 0:
+                    continue
+                residual_scores = tables[np.arange(self._m), codes].sum(axis=1)
+                ids.append(self._list_ids[cluster])
+                scores.append(coarse_scores[i, cluster] + residual_scores)
+
+            if not ids:
+                continue
+
+            ids = np.concatenate(ids)
+            scores = np.concatenate(scores)
+
+            if scores.shape[0] > n_candidates:
+                top = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+                ids, scores = ids[top], scores[top]
+
+            if rerank_vectors is not None:
+                scores = rerank_vectors[ids] @ query[: self._dim]
+
+            order = np.lexsort((ids, -scores))[:k]
+            result_ids[i, : order.shape[0]] = ids[order]
+            result_scores[i, : order.shape[0]] = scores[order]
+
+        return result_ids, result_scores
+
+    def save(self, path: str) -> None:
+        """
+        Stores the index in a single .npz file, with the inverted lists concatenated.
+
+        """
+        offsets = np.cumsum([0] + [ids.shape[0] for ids in self._list_ids])
+
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                dim=self._dim,
+                centroids=self._centroids,
+                codebooks=self._codebooks,
+                offsets=offsets,
+                next_id=self._next_id,
+                ids=np.concatenate(self._list_ids),
+                codes=np.concatenate(self._list_codes),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFPQIndex":
+        """
+        Loads an index stored with save.
+
+        """
+        with np.load(path) as data:
+            centroids = data["centroids"]
+            codebooks = data["codebooks"]
+
+            index = cls(
+                int(data["dim"]), nlist=centroids.shape[0], m=codebooks.shape[0]
+            )
+            index._centroids = centroids
+            index._codebooks = codebooks
+
+            offsets = data["offsets"]
+            next_id = int(data["next_id"])
+            ids = data["ids"]
+            codes = data["codes"]
+
+        index._list_ids = [
+            ids[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+        index._list_codes = [
+            codes[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+        index._ntotal = int(offsets[-1])
+        index._next_id = next_id
+
+        return index
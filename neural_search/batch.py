@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import re
+import time
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from neural_search.linalg import normalize_rows
+
+# Normalised movie vectors of the space currently being exported, set once per
+# worker process by _init_worker instead of being pickled for every block
+_worker_vectors = None
+
+
+def _init_worker(vectors: np.ndarray) -> None:
+    global _worker_vectors
+    _worker_vectors = vectors
+
+
+def top_k_block(start: int, stop: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the k nearest neighbours, by cosine similarity, of the movies in rows
+    start to stop against all movies of the worker's vector space. The movie itself
+    is never returned as its own neighbour.
+
+    Parameters
+    -------
+    start: int
+        First row of the block.
+
+    stop: int
+        Row after the last row of the block.
+
+    k: int
+        Number of neighbours to keep per movie.
+
+    Returns
+    -------
+    neighbours: numpy.ndarray
+        Row indices of the neighbours, shape (stop - start, k), best first.
+
+    scores: numpy.ndarray
+        Cosine similarities corresponding to the neighbours.
+
+    """
+    vectors = _worker_vectors
+    rows = np.arange(start, stop)
+
+    scores = vectors[start:stop] @ vectors.T
+    scores[rows - start, rows] = -np.inf
+
+    k = min(k, vectors.shape[0] - 1)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    neighbours = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    top_scores = np.take_along_axis(top_scores, order, axis=1).astype(np.float32)
+
+    return neighbours, top_scores
+
+
+def _block_path(checkpoint_dir: str, space: str, start: int) -> str:
+    return os.path.join(checkpoint_dir, f"{space}_{start:08d}.npz")
+
+
+def _manifest_path(checkpoint_dir: str, space: str) -> str:
+    return os.path.join(checkpoint_dir, f"{space}_manifest.json")
+
+
+def fingerprint_vectors(vectors: np.ndarray, batch_size: Optional[int] = 4096) -> str:
+    """
+    Returns a SHA-1 hash of the shape, dtype and values of the vectors, hashing them
+    in batches of rows so that the whole matrix is never copied at once.
+
+    """
+    sha1 = hashlib.sha1(f"{vectors.shape}{vectors.dtype}".encode())
+    for start in range(0, vectors.shape[0], batch_size):
+        sha1.update(np.ascontiguousarray(vectors[start : start + batch_size]).data)
+    return sha1.hexdigest()
+
+
+def _reset_checkpoints(checkpoint_dir: str, space: str, manifest: Dict) -> None:
+    """
+    Removes the checkpointed blocks of a vector space unless they were computed
+    for the same manifest, i.e. the same vectors, k and block size, and stores
+    the new manifest.
+
+    """
+    manifest_path = _manifest_path(checkpoint_dir, space)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                return
+
+    block_pattern = re.compile(rf"{re.escape(space)}_\d{{8}}\.npz")
+    for name in os.listdir(checkpoint_dir):
+        if block_pattern.fullmatch(name):
+            os.remove(os.path.join(checkpoint_dir, name))
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+
+def export_space(
+    space: str,
+    vectors: np.ndarray,
+    checkpoint_dir: str,
+    k: Optional[int] = 10,
+    block_size: Optional[int] = 512,
+    workers: Optional[int] = None,
+) -> Dict:
+    """
+    Computes the top-k neighbours of all movies in a single vector space with blocked
+    matrix products on a process pool. Every finished block is written to the check-
+    point directory, and blocks that already have a checkpoint are skipped, so an
+    interrupted export can be resumed by running it again. The checkpoints are
+    discarded when the vectors (e.g. the catalog), k or the block size changed.
+
+    Parameters
+    -------
+    space: str
+        Name of the vector space, used to name the checkpoints.
+
+    vectors: numpy.ndarray
+        Movie vectors, one row per movie.
+
+    checkpoint_dir: str
+        Directory in which the per-block results are stored.
+
+    k: int, optional
+        Number of neighbours to keep per movie.
+
+    block_size: int, optional
+        Number of movies scored against the whole catalog per matrix product.
+
+    workers: int, optional
+        Number of worker processes, defaults to the number of CPUs.
+
+    Returns
+    -------
+    report: dict
+        Number of movies, computed and resumed blocks, and elapsed seconds.
+
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    no_movies = vectors.shape[0]
+    manifest = {
+        "movies": no_movies,
+        "k": k,
+        "block_size": block_size,
+        "fingerprint": fingerprint_vectors(vectors),
+    }
+    _reset_checkpoints(checkpoint_dir, space, manifest)
+
+    starts = range(0, no_movies, block_size)
+    pending = [
+        start
+        for start in starts
+        if not os.path.exists(_block_path(checkpoint_dir, space, start))
+    ]
+
+    begin = time.perf_counter()
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(normalize_rows(vectors),),
+        ) as executor:
+            futures = {
+                start: executor.submit(
+                    top_k_block, start, min(start + block_size, no_movies), k
+                )
+                for start in pending
+            }
+            for start, future in futures.items():
+                neighbours, scores = future.result()
+
+                # Write to a temporary file first so a killed job never leaves
+                # a truncated checkpoint behind
+                path = _block_path(checkpoint_dir, space, start)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, neighbours=neighbours, scores=scores)
+                os.replace(tmp_path, path)
+
+    return {
+        "space": space,
+        "movies": no_movies,
+        "blocks_computed": len(pending),
+        "blocks_resumed": len(starts) - len(pending),
+        "seconds": time.perf_counter() - begin,
+    }
+
+
+def collect_space(
+    space: str, no_movies: int, checkpoint_dir: str, block_size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates the checkpointed blocks of a vector space into the full neighbour
+    and score arrays. Raises a ValueError if the checkpoints were computed for a
+    different number of movies or block size.
+
+    """
+    with open(_manifest_path(checkpoint_dir, space)) as f:
+        manifest = json.load(f)
+
+    if manifest["movies"] != no_movies or manifest["block_size"] != block_size:
+        raise ValueError(
+            f"The {space} checkpoints in {checkpoint_dir} were computed for "
+            f"{manifest['movies']} movies and a block size of "
+            f"{manifest['block_size']}, not {no_movies} and {block_size}"
+        )
+
+    neighbours = []
+    scores = []
+
+    for start in range(0, no_movies, block_size):
+        rows = min(start + block_size, no_movies) - start
+        with np.load(_block_path(checkpoint_dir, space, start)) as block:
+            if block["neighbours"].shape[0] != rows:
+                raise ValueError(
+                    f"The {space} checkpoint of block {start} has "
+                    f"{block['neighbours'].shape[0]} rows instead of {rows}"
+                )
+            neighbours.append(block["neighbours"])
+            scores.append(block["scores"])
+
+    return np.concatenate(neighbours), np.concatenate(scores)
+
+
+def write_recommendations(
+    output_path: str,
+    titles: List,
+    checkpoint_dir: str,
+    spaces: List,
+    block_size: int,
+) -> None:
+    """
+    Writes the exported recommendations to a single compressed .npz file with one
+    array (column) per field: the movie titles, followed by the neighbour indices
+    and scores for every vector space, e.g. "plot_neighbours" and "plot_scores".
+    The neighbour indices refer to positions in the "titles" column.
+
+    """
+    columns = {"titles": np.asarray(titles, dtype=str)}
+
+    for space in spaces:
+        neighbours, scores = collect_space(
+            space, len(titles), checkpoint_dir, block_size
+        )
+        columns[f"{space}_neighbours"] = neighbours
+        columns[f"{space}_scores"] = scores
+
+    with open(output_path, "wb") as f:
+        np.savez_compressed(f, **columns)
@@ -1,5 +1,5 @@
 import os
-from sentence_transformers import SentenceTransformer
+from functools import lru_cache
 
 DATA_DIR = os.environ.get("DATA_DIR", "data")
 movies_csv = os.path.join(DATA_DIR, "tmdb_5000_movies.csv")
@@ -15,8 +15,36 @@ features_weight = {
     "production_companies": 1,
 }
 
+# Query-time weights for the blended recommendations, i.e. how much the plot (tf-idf),
+# metadata (count) and title embedding similarities contribute to the final score
+blend_weights = {
+    "plot": 1.0,
+    "metadata": 1.0,
+    "title": 0.5,
+}
+
+# Number of nearest neighbours fetched from each vector space before blending
+blend_candidates = 20
+
 # ML model to use for title embedding, currently a symmetric semantic search model
-model = SentenceTransformer("multi-qa-distilbert-cos-v1")
+model_name = "multi-qa-distilbert-cos-v1"
+
+
+@lru_cache(maxsize=None)
+def get_model(name: str = model_name):
+    """
+    Loads the ML model on first use, so that modules such as the local vector store
+    don't need sentence_transformers (and a model download) just to be imported.
+
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name)
+
+
+# Title embeddings are cached here, so that they are only computed once by populate.py
+# instead of every time NeuralSearch starts
+title_vectors_cache = os.path.join(DATA_DIR, "title_vectors.npz")
 
 tfidf_coll_name = "plot_tf-idf"
 metadata_coll_name = "metadata_count"
@@ -25,6 +53,34 @@ titles_coll_name = "titles"
 # Maximum number of rows to read from tmbd data set
 max_data = os.environ.get("MAX_DATA", None)
 
+# Vector backend used for storing and searching the vectors, either "qdrant" for the
+# Qdrant cluster or "local" for the in-process store persisted under local_store_dir
+vector_backend = os.environ.get("VECTOR_BACKEND", "qdrant")
+local_store_dir = os.environ.get("LOCAL_STORE_DIR", os.path.join(DATA_DIR, "vectors"))
+
+# Approximate nearest neighbour index for the local backend, either "ivfpq" or None for
+# exact (brute force) search. nlist and pq_m set the number of clusters and the bytes per
+# vector, while nprobe and rerank_factor trade query latency for recall.
+ann_index = os.environ.get("ANN_INDEX", None)
+ann_params = {
+    "nlist": 256,
+    "pq_m": 16,
+    "nprobe": 8,
+    "rerank_factor": 10,
+}
+
 # Configure connection to Qdrant cluster
 host = os.environ.get("HOST", "localhost")
 api_key = os.environ.get("API_KEY", None)
+
+# Admission control of the web-app: requests beyond max_pending_requests are shed on
+# arrival, at most max_concurrent_encodes model encodes and max_concurrent_searches
+# vector searches run at once, and each request has a latency budget of request_budget
+# seconds from its arrival. Once less than degrade_margin seconds are left, a request
+# is served cached or lexical-only results instead of waiting any longer.
+max_pending_requests = int(os.environ.get("MAX_PENDING_REQUESTS", 64))
+max_concurrent_encodes = int(os.environ.get("MAX_CONCURRENT_ENCODES", 2))
+max_concurrent_searches = int(os.environ.get("MAX_CONCURRENT_SEARCHES", 8))
+request_budget = float(os.environ.get("REQUEST_BUDGET", 2.0))
+degrade_margin = float(os.environ.get("DEGRADE_MARGIN", 0.25))
+search_cache_size = 1024
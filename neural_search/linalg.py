@@ -0,0 +1,24 @@
+import numpy as np
+
+
+def compute_row_norms(vectors: np.ndarray) -> np.ndarray:
+    """
+    Computes the L2 norm of every row (movie vector) in the given matrix. Rows with
+    zero norm, e.g. movies without an overview, are set to 1 so that dividing by the
+    norm never results in NaN.
+
+    """
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    return norms
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scales every row (movie vector) to unit length, in float32, so that cosine
+    similarities reduce to plain matrix products. Rows with zero norm are kept
+    as zero vectors.
+
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / compute_row_norms(vectors)[:, None]
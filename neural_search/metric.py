@@ -1,10 +1,13 @@
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+import os
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-from neural_search.config import features_weight
+from neural_search.config import features_weight, model_name, title_vectors_cache
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 def construct_tfidf_plot(df: pd.DataFrame) -> Tuple[List, List]:
@@ -104,7 +107,7 @@ def construct_metadata_vectors(df: pd.DataFrame) -> Tuple[List, List]:
     return vectors.astype(float), payload
 
 
-def construct_title_vectors(model: SentenceTransformer, titles: List) -> List:
+def construct_title_vectors(model: "SentenceTransformer", titles: List) -> List:
     """
     Embeds all the movie titles, provided in the list, to vectors using the ML model
     specified in config.py.
@@ -140,3 +143,92 @@ def construct_title_vectors(model: SentenceTransformer, titles: List) -> List:
     vectors = np.concatenate(vectors)
 
     return vectors
+
+
+def load_title_vectors(
+    model: "SentenceTransformer",
+    titles: List,
+    path: Optional[str] = None,
+    name: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Returns the title embeddings from the cache file (title_vectors_cache in config.py)
+    if it was built for exactly the same titles with the same model. Otherwise, the
+    titles are embedded with construct_title_vectors and the cache is (re-)written.
+
+    Parameters
+    -------
+    model: sentence_transformers.SentenceTransformer
+        Pre-trained machine learning model for embedding
+
+    titles: list
+        Movie titles to be embedded as vectors.
+
+    path: str, optional
+        Location of the cache file.
+
+    name: str, optional
+        Name of the model, stored in the cache file. Defaults to model_name in
+        config.py.
+
+    Returns
+    -------
+    vectors: numpy.ndarray
+        Embedded vectors based on movie title.
+
+    """
+    path = path or title_vectors_cache
+    name = name or model_name
+    titles = np.asarray(list(titles), dtype=str)
+
+    if os.path.exists(path):
+        with np.load(path) as cache:
+            if (
+                "model_name" in cache
+                and cache["model_name"] == name
+                and np.array_equal(cache["titles"], titles)
+            ):
+                return cache["vectors"]
+
+    vectors = construct_title_vectors(model, titles)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez(f, model_name=name, titles=titles, vectors=vectors)
+
+    return vectors
+
+
+def cosine_similarity_rows(
+    vectors: np.ndarray, norms: np.ndarray, rows: List, vector: np.ndarray
+) -> np.ndarray:
+    """
+    Computes the cosine similarity between a single vector and the given rows of
+    the matrix in one vectorised product, using the precomputed row norms instead
+    of normalising the whole (dense) matrix.
+
+    Parameters
+    -------
+    vectors: numpy.ndarray
+        Matrix of movie vectors, one row per movie.
+
+    norms: numpy.ndarray
+        L2 norms of the matrix rows, see neural_search.linalg.compute_row_norms.
+
+    rows: list
+        Indices of the rows to compare against.
+
+    vector: numpy.ndarray
+        Query vector.
+
+    Returns
+    -------
+    similarities: numpy.ndarray
+        Cosine similarity of each of the given rows with the query vector.
+
+    """
+    vector_norm = np.linalg.norm(vector)
+    if vector_norm == 0:
+        return np.zeros(len(rows))
+
+    return (vectors[rows] @ vector) / (norms[rows] * vector_norm)
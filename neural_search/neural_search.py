@@ -2,24 +2,47 @@ from neural_search.prepare_data import load_movie_data
 from neural_search.metric import (
     construct_tfidf_plot,
     construct_metadata_vectors,
+    load_title_vectors,
+    cosine_similarity_rows,
 )
+from neural_search.linalg import compute_row_norms
 from neural_search.config import (
-    model,
+    get_model,
     tfidf_coll_name,
     titles_coll_name,
     metadata_coll_name,
+    blend_weights,
+    blend_candidates,
+    max_concurrent_encodes,
+    max_concurrent_searches,
+    max_pending_requests,
+    degrade_margin,
+    search_cache_size,
 )
-from neural_search.upload import establish_conn
+from neural_search.vector_store import VectorStore, establish_store
+from neural_search.admission import AdmissionController, Deadline, LRUCache
 
-from typing import List, Optional
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
 
 
 class NeuralSearch:
-    def __init__(self):
+    def __init__(self, store: Optional[VectorStore] = None):
         self._df = load_movie_data()
         self._no_movies = self._df.shape[0]
+        self._titles_lower = self._df["title"].str.lower()
 
-        self._qdrant_client = establish_conn()
+        self._store = store or establish_store()
+
+        self._admission = AdmissionController(
+            max_concurrent_encodes,
+            max_concurrent_searches,
+            degrade_margin,
+            max_pending=max_pending_requests,
+        )
+        self._search_cache = LRUCache(search_cache_size)
 
         self._tfidf_coll_name = tfidf_coll_name
         self._metadata_coll_name = metadata_coll_name
@@ -28,15 +51,46 @@ class NeuralSearch:
         self._vectors_tfidf, _ = construct_tfidf_plot(self._df)
         self._vectors_metadata, _ = construct_metadata_vectors(self._df)
 
-        self._model = model
+        self._model = get_model()
+        self._vectors_title = load_title_vectors(self._model, self._df["title"])
+
+        # Row norms are computed once so that blended recommendations only need
+        # a dot product over the candidate rows
+        self._norms_tfidf = compute_row_norms(self._vectors_tfidf)
+        self._norms_metadata = compute_row_norms(self._vectors_metadata)
+        self._norms_title = compute_row_norms(self._vectors_title)
+
+        # Titles shared by several movies are left out, as in get_movie_index
+        unique_titles = self._df["title"].drop_duplicates(keep=False)
+        self._title_to_index = dict(zip(unique_titles.values, unique_titles.index))
 
     @property
     def vectors(self):
         return self._vectors
 
+    @property
+    def vector_store(self):
+        return self._store
+
     @property
     def qdrant_client(self):
-        return self._qdrant_client
+        return getattr(self._store, "client", None)
+
+    @property
+    def admission(self) -> AdmissionController:
+        return self._admission
+
+    @property
+    def titles(self) -> List:
+        return self._df["title"].to_list()
+
+    @property
+    def space_vectors(self) -> Dict:
+        return {
+            "plot": self._vectors_tfidf,
+            "metadata": self._vectors_metadata,
+            "title": self._vectors_title,
+        }
 
     def get_movie_index(self, movie_title: str) -> int:
         """
@@ -81,7 +135,7 @@ class NeuralSearch:
         """
         idx = self.get_movie_index(movie_title)
 
-        if idx:
+        if idx is not None:
             return True
 
         return False
@@ -109,49 +163,244 @@ class NeuralSearch:
         genres = [genre.capitalize() for genre in genres]
         return genres
 
-    def search_movies(self, query: str):
+    def search_movies(self, query: str, deadline: Optional[Deadline] = None):
         """
         For a given query, it searches for the closest matching movies
         in the 'titles' vector space.
 
+        If the deadline is near, or no encode or search slot frees up in
+        time, the results are served by degraded_search instead.
+
         """
-        vector = self._model.encode(query.lower()).tolist()
+        query = query.lower()
 
-        search_result = self._qdrant_client.search(
-            collection_name=self._titles_coll_name,
-            query_vector=vector,
-            query_filter=None,
-            top=5,
-        )
+        if self._admission.should_degrade(deadline):
+            return self.degraded_search(query)
+
+        if not self._admission.try_acquire("encode", deadline):
+            return self.degraded_search(query)
+        try:
+            vector = self._model.encode(query).tolist()
+        finally:
+            self._admission.release("encode")
+
+        if self._admission.should_degrade(deadline):
+            return self.degraded_search(query)
+
+        if not self._admission.try_acquire("search", deadline):
+            return self.degraded_search(query)
+        try:
+            search_result = self._store.search(
+                collection_name=self._titles_coll_name,
+                query_vector=vector,
+                top=5,
+            )
+        finally:
+            self._admission.release("search")
 
         payloads = [hit.payload["title"] for hit in search_result]
+        self._search_cache.put(query, payloads)
         return payloads
 
-    def recommend_movies(self, movie_title: str, type: str) -> List:
+    def degraded_search(self, query: str) -> List:
         """
-        For a movie in the database, it recommends similar movies based either
-        on the plot (tf-idf) or metadata (count).
+        Serves the cached results of an earlier search for the same query or,
+        if there are none, the lexical search results. The request is counted
+        as degraded.
 
         """
-        if not self.movie_exists(movie_title):
+        self._admission.record("degraded")
+
+        cached = self._search_cache.get(query.lower())
+        if cached is not None:
+            return cached
+
+        return self.lexical_search(query)
+
+    def lexical_search(self, query: str, n: Optional[int] = 5) -> List:
+        """
+        Ranks the movie titles by the number of query words they contain, pre-
+        ferring shorter titles on ties. It doesn't need the ML model or the
+        vector store and is used for degraded responses.
+
+        """
+        words = query.lower().split()
+        if not words:
             return []
 
-        vector = []
+        scores = sum(
+            self._titles_lower.str.contains(word, regex=False).astype(int)
+            for word in words
+        )
+        scores = scores[scores > 0]
+
+        ranking = pd.DataFrame(
+            {"score": scores, "length": self._titles_lower[scores.index].str.len()}
+        ).sort_values(["score", "length"], ascending=[False, True], kind="stable")
+
+        return self._df.loc[ranking.index[:n], "title"].to_list()
+
+    def _recommendation_query(self, movie_title: str, type: str) -> Optional[Tuple]:
+        """
+        Returns the collection name and query vector used to recommend movies
+        similar to a movie, or None if the movie or type doesn't exist.
+
+        """
+        if not self.movie_exists(movie_title):
+            return None
 
         if type == "tfidf":
-            collection_name = self._tfidf_coll_name
-            vector = self.get_movie_vector_tfidf(movie_title)
+            return self._tfidf_coll_name, self.get_movie_vector_tfidf(movie_title)
         elif type == "count":
-            collection_name = self._metadata_coll_name
-            vector = self.get_movie_vector_metadata(movie_title)
-        else:
-            return []
+            return self._metadata_coll_name, self.get_movie_vector_metadata(movie_title)
 
-        search_result = self._qdrant_client.search(
+        return None
+
+    def _search_recommendations(
+        self, movie_title: str, collection_name: str, vector: List
+    ) -> List:
+        """
+        Returns the four movies closest to the vector, excluding the movie itself.
+        It is excluded by title rather than by dropping the first hit, as a movie
+        with an identical vector may be ranked before it.
+
+        """
+        search_result = self._store.search(
             collection_name=collection_name,
             query_vector=vector,
-            query_filter=None,
             top=5,
         )
-        payloads = [hit.payload["title"] for hit in search_result]
-        return payloads[1:]
+        payloads = [
+            hit.payload["title"]
+            for hit in search_result
+            if hit.payload["title"] != movie_title
+        ]
+        return payloads[:4]
+
+    def recommend_movies(
+        self, movie_title: str, type: str, deadline: Optional[Deadline] = None
+    ) -> List:
+        """
+        For a movie in the database, it recommends similar movies based either
+        on the plot (tf-idf) or metadata (count). Raises Overloaded if no search
+        slot frees up before the deadline is near.
+
+        """
+        query = self._recommendation_query(movie_title, type)
+        if query is None:
+            return []
+
+        with self._admission.slot("search", deadline):
+            return self._search_recommendations(movie_title, *query)
+
+    def recommend_movie_lists(
+        self, movie_title: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[List, List]:
+        """
+        Returns the metadata-based and plot-based recommendations shown on the
+        movie page. The plot-based list is secondary: it is skipped, and the
+        request counted as degraded, if the deadline is near or no search slot
+        frees up in time. Raises Overloaded if the metadata-based list cannot
+        be served.
+
+        """
+        similar_metadata_movies = self.recommend_movies(movie_title, "count", deadline)
+
+        query = self._recommendation_query(movie_title, "tfidf")
+        if query is None:
+            return similar_metadata_movies, []
+
+        if self._admission.should_degrade(
+            deadline
+        ) or not self._admission.try_acquire("search", deadline):
+            self._admission.record("degraded")
+            return similar_metadata_movies, []
+
+        try:
+            similar_plot_movies = self._search_recommendations(movie_title, *query)
+        finally:
+            self._admission.release("search")
+
+        return similar_metadata_movies, similar_plot_movies
+
+    def recommend_movies_blended(
+        self,
+        movie_title: str,
+        weights: Optional[Dict] = None,
+        n: Optional[int] = 4,
+        deadline: Optional[Deadline] = None,
+    ) -> List:
+        """
+        For a movie in the database, it recommends similar movies scored as a weighted
+        combination of the plot (tf-idf), metadata (count) and title embedding cosine
+        similarities. The weights default to blend_weights in config.py and can be
+        overridden per request, e.g. {"plot": 0.2, "metadata": 1.0}, without rebuilding
+        or re-uploading any collection. Unknown spaces and negative or non-finite
+        weights raise a ValueError.
+
+        The candidates are the union of the nearest neighbours from each vector space
+        with a non-zero weight, which are then re-scored locally in all the spaces.
+        Once the deadline is near, the remaining spaces are not searched and only
+        the candidates found so far are re-scored.
+
+        """
+        if not self.movie_exists(movie_title):
+            return []
+
+        weights = {**blend_weights, **(weights or {})}
+        unknown = set(weights) - set(blend_weights)
+        if unknown:
+            raise ValueError(f"Unknown blend weights: {', '.join(sorted(unknown))}")
+        if not all(math.isfinite(weight) and weight >= 0 for weight in weights.values()):
+            raise ValueError("Blend weights must be finite and not negative")
+
+        idx = self.get_movie_index(movie_title)
+        spaces = {
+            "plot": (self._tfidf_coll_name, self._vectors_tfidf, self._norms_tfidf),
+            "metadata": (
+                self._metadata_coll_name,
+                self._vectors_metadata,
+                self._norms_metadata,
+            ),
+            "title": (self._titles_coll_name, self._vectors_title, self._norms_title),
+        }
+        spaces = {
+            space: values
+            for space, values in spaces.items()
+            if weights.get(space, 0) > 0
+        }
+        if not spaces:
+            return []
+
+        candidates = set()
+        for collection_name, vectors, _ in spaces.values():
+            if candidates and self._admission.should_degrade(deadline):
+                self._admission.record("degraded")
+                break
+
+            with self._admission.slot("search", deadline):
+                search_result = self._store.search(
+                    collection_name=collection_name,
+                    query_vector=vectors[idx],
+                    top=blend_candidates,
+                )
+            for hit in search_result:
+                candidate_idx = self._title_to_index.get(hit.payload["title"])
+                if candidate_idx is not None and candidate_idx != idx:
+                    candidates.add(candidate_idx)
+
+        if not candidates:
+            return []
+
+        candidates = list(candidates)
+        scores = np.zeros(len(candidates))
+        total_weight = sum(weights[space] for space in spaces)
+
+        for space, (_, vectors, norms) in spaces.items():
+            similarities = cosine_similarity_rows(
+                vectors, norms, candidates, vectors[idx]
+            )
+            scores += weights[space] / total_weight * similarities
+
+        top = np.argsort(-scores, kind="stable")[:n]
+        return [self._df.at[candidates[i], "title"] for i in top]
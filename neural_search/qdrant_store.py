@@ -0,0 +1,131 @@
+import numpy as np
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointIdsList,
+    SearchRequest,
+)
+from neural_search.upload import establish_conn, upload_data
+from neural_search.vector_store import Hit, VectorStore
+
+from typing import Dict, List, Optional
+
+
+def to_qdrant_filter(payload_filter: Optional[Dict]) -> Optional[Filter]:
+    """
+    Converts a payload filter dictionary, e.g. {"title": "Avatar"}, to a Qdrant
+    filter that requires all the fields to match.
+
+    """
+    if not payload_filter:
+        return None
+
+    return Filter(
+        must=[
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in payload_filter.items()
+        ]
+    )
+
+
+def to_hit(point, score: Optional[float] = None) -> Hit:
+    return Hit(id=point.id, score=score, payload=point.payload)
+
+
+def to_ranked_hits(search_result: List) -> List[Hit]:
+    """
+    Converts the scored points to hits, breaking ties in the score by the id as
+    Qdrant doesn't guarantee any order for them.
+
+    """
+    hits = [to_hit(hit, hit.score) for hit in search_result]
+    return sorted(hits, key=lambda hit: (-hit.score, hit.id))
+
+
+class QdrantVectorStore(VectorStore):
+    """
+    Vector store backed by a Qdrant cluster, configured with host and api_key in
+    config.py.
+
+    """
+
+    def __init__(self, qdrant_client: Optional[QdrantClient] = None):
+        self._client = qdrant_client or establish_conn()
+
+    @property
+    def client(self) -> QdrantClient:
+        return self._client
+
+    def upload(
+        self,
+        collection_name: str,
+        vectors: np.ndarray,
+        payload: Optional[List] = None,
+        ids: Optional[List] = None,
+    ) -> None:
+        if ids is None:
+            ids = list(range(vectors.shape[0]))
+
+        upload_data(self._client, collection_name, vectors, payload, ids)
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+    ) -> List[Hit]:
+        search_result = self._client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            query_filter=to_qdrant_filter(query_filter),
+            limit=top,
+        )
+        return to_ranked_hits(search_result)
+
+    def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+    ) -> List[List[Hit]]:
+        requests = [
+            SearchRequest(
+                vector=list(map(float, vector)),
+                filter=to_qdrant_filter(query_filter),
+                limit=top,
+                with_payload=True,
+            )
+            for vector in query_vectors
+        ]
+        search_results = self._client.search_batch(
+            collection_name=collection_name, requests=requests
+        )
+        return [to_ranked_hits(search_result) for search_result in search_results]
+
+    def filter(self, collection_name: str, payload_filter: Dict) -> List[Hit]:
+        hits = []
+        offset = None
+
+        while True:
+            points, offset = self._client.scroll(
+                collection_name=collection_name,
+                scroll_filter=to_qdrant_filter(payload_filter),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+            )
+            hits.extend(to_hit(point) for point in points)
+            if offset is None:
+                break
+
+        return hits
+
+    def delete(self, collection_name: str, ids: List) -> None:
+        self._client.delete(
+            collection_name=collection_name, points_selector=PointIdsList(points=list(ids))
+        )
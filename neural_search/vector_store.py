@@ -0,0 +1,427 @@
+import json
+import os
+import random
+import shutil
+import time
+import numpy as np
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from neural_search.ann import IVFPQIndex
+from neural_search.config import vector_backend, local_store_dir, ann_index, ann_params
+from neural_search.linalg import normalize_rows
+
+
+@dataclass
+class Hit:
+    """
+    A single point returned by a vector store, with its similarity score for
+    searches or None when the point was matched by a payload filter.
+
+    """
+
+    id: int
+    score: Optional[float]
+    payload: Dict
+
+
+class VectorStore(ABC):
+    """
+    Interface of the vector backends used by NeuralSearch and the upload scripts.
+    All collections use cosine similarity, and filters are dictionaries of payload
+    fields and the values they must be equal to, e.g. {"title": "Avatar"}. Search
+    results are ordered by descending score and then by ascending id.
+
+    """
+
+    @abstractmethod
+    def upload(
+        self,
+        collection_name: str,
+        vectors: np.ndarray,
+        payload: Optional[List] = None,
+        ids: Optional[List] = None,
+    ) -> None:
+        """
+        (Re-)creates the collection with the given vectors, replacing any old data.
+        The ids default to the row number of each vector.
+
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        collection_name: str,
+        query_vector: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+    ) -> List[Hit]:
+        """
+        Returns the top closest points to the query vector, best first.
+
+        """
+
+    @abstractmethod
+    def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+    ) -> List[List[Hit]]:
+        """
+        Searches the collection for several query vectors at once.
+
+        """
+
+    @abstractmethod
+    def filter(self, collection_name: str, payload_filter: Dict) -> List[Hit]:
+        """
+        Returns all points whose payload matches the filter, ordered by id.
+
+        """
+
+    @abstractmethod
+    def delete(self, collection_name: str, ids: List) -> None:
+        """
+        Removes the points with the given ids from the collection.
+
+        """
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store which only depends on NumPy. Each collection is stored
+    in its own directory as L2-normalised float32 vectors (vectors.npy), ids (ids.npy)
+    and payload (payload.json). The vectors are memory-mapped when read, so only the
+    pages touched by a search are loaded into memory. Deleted points are only marked
+    in deleted.npy, so that the vectors never need to be rewritten.
+
+    With ann_index set to "ivfpq", an IVFPQIndex (index.npz) is built for every coll-
+    ection and used for searches without a filter; filtered searches stay exact. The
+    nprobe and rerank_factor of ann_params can be overridden per search.
+
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        index_type: Optional[str] = ann_index,
+        index_params: Optional[Dict] = None,
+    ):
+        if index_type not in (None, "ivfpq"):
+            raise ValueError(f"Unknown ANN index: {index_type}")
+
+        self._path = path or local_store_dir
+        self._index_type = index_type
+        self._index_params = {**ann_params, **(index_params or {})}
+        self._collections = {}
+
+    def _collection_dir(self, collection_name: str) -> str:
+        return os.path.join(self._path, collection_name)
+
+    def _load(self, collection_name: str) -> Dict:
+        if collection_name not in self._collections:
+            collection_dir = self._collection_dir(collection_name)
+            with open(os.path.join(collection_dir, "payload.json")) as f:
+                payload = json.load(f)
+
+            index_path = os.path.join(collection_dir, "index.npz")
+            index = None
+            if self._index_type and os.path.exists(index_path):
+                index = IVFPQIndex.load(index_path)
+
+            ids = np.load(os.path.join(collection_dir, "ids.npy"))
+
+            deleted_path = os.path.join(collection_dir, "deleted.npy")
+            if os.path.exists(deleted_path):
+                deleted = np.load(deleted_path)
+            else:
+                deleted = np.zeros(ids.shape[0], dtype=bool)
+
+            self._collections[collection_name] = {
+                "vectors": np.load(
+                    os.path.join(collection_dir, "vectors.npy"), mmap_mode="r"
+                ),
+                "ids": ids,
+                "payload": payload,
+                "deleted": deleted,
+                "index": index,
+            }
+
+        return self._collections[collection_name]
+
+    def _write(
+        self,
+        collection_name: str,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        payload: List,
+        index: Optional[IVFPQIndex] = None,
+    ) -> None:
+        self._collections.pop(collection_name, None)
+
+        collection_dir = self._collection_dir(collection_name)
+        if os.path.exists(collection_dir):
+            shutil.rmtree(collection_dir)
+        os.makedirs(collection_dir)
+
+        np.save(os.path.join(collection_dir, "vectors.npy"), vectors)
+        np.save(os.path.join(collection_dir, "ids.npy"), ids)
+        with open(os.path.join(collection_dir, "payload.json"), "w") as f:
+            json.dump(payload, f)
+
+        if index is not None:
+            index.save(os.path.join(collection_dir, "index.npz"))
+
+    def build_index(
+        self, vectors: np.ndarray, batch_size: Optional[int] = 10000
+    ) -> IVFPQIndex:
+        """
+        Trains an IVFPQIndex on the vectors and adds them batch by batch, with the row
+        numbers as ids.
+
+        """
+        index = IVFPQIndex(
+            vectors.shape[1],
+            nlist=self._index_params["nlist"],
+            m=self._index_params["pq_m"],
+        )
+        index.train(vectors)
+
+        for start in range(0, vectors.shape[0], batch_size):
+            index.add(vectors[start : start + batch_size])
+
+        return index
+
+    def _mask(self, collection: Dict, payload_filter: Optional[Dict]) -> np.ndarray:
+        mask = ~collection["deleted"]
+        if not payload_filter:
+            return mask
+
+        return mask & np.array(
+            [
+                all(entry.get(key) == value for key, value in payload_filter.items())
+                for entry in collection["payload"]
+            ],
+            dtype=bool,
+        )
+
+    def _hits(self, collection: Dict, rows: np.ndarray, scores: np.ndarray) -> List:
+        order = np.lexsort((collection["ids"][rows], -scores))
+        rows, scores = rows[order], scores[order]
+
+        return [
+            Hit(
+                id=int(collection["ids"][row]),
+                score=float(score),
+                payload=collection["payload"][row],
+            )
+            for row, score in zip(rows, scores)
+        ]
+
+    def upload(
+        self,
+        collection_name: str,
+        vectors: np.ndarray,
+        payload: Optional[List] = None,
+        ids: Optional[List] = None,
+    ) -> None:
+        vectors = normalize_rows(vectors)
+
+        if ids is None:
+            ids = range(vectors.shape[0])
+        if payload is None:
+            payload = [{} for _ in range(vectors.shape[0])]
+
+        index = None
+        if self._index_type and vectors.shape[0] > 0:
+            index = self.build_index(vectors)
+
+        self._write(
+            collection_name,
+            vectors,
+            np.asarray(list(ids), dtype=np.int64),
+            list(payload),
+            index,
+        )
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+        nprobe: Optional[int] = None,
+        rerank_factor: Optional[int] = None,
+    ) -> List[Hit]:
+        return self.search_batch(
+            collection_name,
+            np.asarray(query_vector)[None, :],
+            top,
+            query_filter,
+            nprobe=nprobe,
+            rerank_factor=rerank_factor,
+        )[0]
+
+    def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+        nprobe: Optional[int] = None,
+        rerank_factor: Optional[int] = None,
+    ) -> List[List[Hit]]:
+        collection = self._load(collection_name)
+        vectors = collection["vectors"]
+
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+
+        if collection["index"] is not None and not query_filter:
+            rows, scores = collection["index"].search(
+                query_vectors,
+                k=top,
+                nprobe=nprobe or self._index_params["nprobe"],
+                rerank_vectors=vectors,
+                rerank_factor=rerank_factor or self._index_params["rerank_factor"],
+            )
+            return [
+                self._hits(collection, row_ids[row_ids >= 0], row_scores[row_ids >= 0])
+                for row_ids, row_scores in zip(rows, scores)
+            ]
+
+        scores = normalize_rows(query_vectors) @ vectors.T
+
+        mask = self._mask(collection, query_filter)
+        scores[:, ~mask] = -np.inf
+        top = min(top, int(mask.sum()))
+
+        if top <= 0:
+            return [[] for _ in range(len(query_vectors))]
+
+        results = []
+        for row_scores in scores:
+            rows = np.argpartition(-row_scores, top - 1)[:top]
+            results.append(self._hits(collection, rows, row_scores[rows]))
+
+        return results
+
+    def filter(self, collection_name: str, payload_filter: Dict) -> List[Hit]:
+        collection = self._load(collection_name)
+        mask = self._mask(collection, payload_filter)
+
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(collection["ids"][rows], kind="stable")]
+
+        return [
+            Hit(
+                id=int(collection["ids"][row]),
+                score=None,
+                payload=collection["payload"][row],
+            )
+            for row in rows
+        ]
+
+    def delete(self, collection_name: str, ids: List) -> None:
+        collection = self._load(collection_name)
+        collection_dir = self._collection_dir(collection_name)
+
+        rows = np.flatnonzero(
+            np.isin(collection["ids"], np.asarray(ids, dtype=np.int64))
+            & ~collection["deleted"]
+        )
+        if rows.shape[0] == 0:
+            return
+
+        collection["deleted"][rows] = True
+        np.save(os.path.join(collection_dir, "deleted.npy"), collection["deleted"])
+
+        # The index uses the row numbers as ids, so the rows are simply dropped from
+        # the inverted lists without retraining
+        if collection["index"] is not None:
+            collection["index"].remove_ids(rows)
+            collection["index"].save(os.path.join(collection_dir, "index.npz"))
+
+
+class StubVectorStore(VectorStore):
+    """
+    Vector store which ignores the vectors and returns random points of the uploaded
+    payload after sleeping for delay seconds. It simulates a slow backend for load
+    tests without needing a populated store.
+
+    """
+
+    def __init__(self, delay: Optional[float] = 0.0, seed: Optional[int] = None):
+        self._delay = delay
+        self._random = random.Random(seed)
+        self._payload = {}
+
+    def upload(
+        self,
+        collection_name: str,
+        vectors: np.ndarray,
+        payload: Optional[List] = None,
+        ids: Optional[List] = None,
+    ) -> None:
+        if payload is None:
+            payload = [{} for _ in range(len(vectors))]
+        self._payload[collection_name] = dict(enumerate(payload))
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+    ) -> List[Hit]:
+        return self.search_batch(collection_name, [query_vector], top, query_filter)[0]
+
+    def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: np.ndarray,
+        top: Optional[int] = 5,
+        query_filter: Optional[Dict] = None,
+    ) -> List[List[Hit]]:
+        time.sleep(self._delay)
+
+        hits = self.filter(collection_name, query_filter or {})
+        return [
+            [
+                Hit(id=hit.id, score=0.0, payload=hit.payload)
+                for hit in self._random.sample(hits, min(top, len(hits)))
+            ]
+            for _ in query_vectors
+        ]
+
+    def filter(self, collection_name: str, payload_filter: Dict) -> List[Hit]:
+        return [
+            Hit(id=id, score=None, payload=entry)
+            for id, entry in self._payload[collection_name].items()
+            if all(entry.get(key) == value for key, value in payload_filter.items())
+        ]
+
+    def delete(self, collection_name: str, ids: List) -> None:
+        for id in ids:
+            self._payload[collection_name].pop(id, None)
+
+
+def establish_store() -> VectorStore:
+    """
+    Creates the vector store selected with vector_backend in config.py, either
+    "qdrant" for the Qdrant cluster or "local" for the in-process store.
+
+    """
+    if vector_backend == "local":
+        return LocalVectorStore()
+
+    if vector_backend == "qdrant":
+        # Imported here so that the local backend works without qdrant_client
+        from neural_search.qdrant_store import QdrantVectorStore
+
+        return QdrantVectorStore()
+
+    raise ValueError(f"Unknown vector backend: {vector_backend}")
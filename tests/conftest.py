@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import neural_search.metric
+import neural_search.neural_search
+from neural_search.config import titles_coll_name, tfidf_coll_name, metadata_coll_name
+
+# The first two movies share all their metadata, i.e. have identical Count vectors
+TITLES = [
+    "The Dark Knight",
+    "The Dark Knight Rises",
+    "Knight and Day",
+    "Avatar",
+    "Titanic",
+    "Inception",
+]
+
+
+class FakeModel:
+    """
+    Stand-in for the SentenceTransformer which embeds a title by its length and
+    number of words, so that tests don't need to download the real model.
+
+    """
+
+    def encode(self, sentences):
+        vectors = np.array(
+            [
+                [len(sentence), sentence.count(" "), 1.0]
+                for sentence in np.atleast_1d(sentences)
+            ]
+        )
+        return vectors if np.ndim(sentences) else vectors[0]
+
+
+def movie_data():
+    return pd.DataFrame(
+        {
+            "title": TITLES,
+            "overview": [
+                "a billionaire fights crime in gotham as a masked vigilante",
+                "a masked vigilante returns to gotham to fight a terrorist",
+                "a spy and a woman on the run around the world",
+                "a marine on an alien moon fights for the natives",
+                "a young couple falls in love aboard a sinking ship",
+                "a thief steals secrets from dreams of a billionaire",
+            ],
+            "genres": [["action"], ["action"], ["comedy"], ["scifi"], ["drama"], ["scifi"]],
+            "keywords": [["batman"], ["batman"], ["spy"], ["alien"], ["ship"], ["dream"]],
+            "cast": [["bale"], ["bale"], ["cruise"], ["worthington"], ["winslet"], ["page"]],
+            "director": ["nolan", "nolan", "mangold", "cameron", "cameron", "nolan"],
+            "production_companies": [["wb"], ["wb"], ["fox"], ["fox"], ["fox"], ["wb"]],
+        }
+    )
+
+
+@pytest.fixture
+def create_search(monkeypatch, tmp_path):
+    """
+    Returns a factory which creates a NeuralSearch on the movies above, backed by
+    the given vector store with all three collections uploaded. Keyword arguments
+    override module-level settings of neural_search.neural_search, such as
+    max_concurrent_searches or blend_candidates.
+
+    """
+
+    def create(store, **settings):
+        monkeypatch.setattr(neural_search.neural_search, "load_movie_data", movie_data)
+        monkeypatch.setattr(neural_search.neural_search, "get_model", FakeModel)
+        monkeypatch.setattr(
+            neural_search.metric, "title_vectors_cache", str(tmp_path / "titles.npz")
+        )
+        for name, value in settings.items():
+            monkeypatch.setattr(neural_search.neural_search, name, value)
+
+        ns = neural_search.neural_search.NeuralSearch(store=store)
+
+        payload = [{"title": title} for title in TITLES]
+        space_vectors = ns.space_vectors
+        store.upload(titles_coll_name, space_vectors["title"], payload)
+        store.upload(tfidf_coll_name, space_vectors["plot"], payload)
+        store.upload(metadata_coll_name, space_vectors["metadata"], payload)
+
+        return ns
+
+    return create
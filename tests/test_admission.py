@@ -0,0 +1,97 @@
+import time
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from neural_search.admission import Deadline, Overloaded
+from neural_search.vector_store import StubVectorStore
+
+DEGRADE_MARGIN = 0.2
+
+
+@pytest.fixture
+def search(create_search):
+    def create(delay):
+        return create_search(
+            StubVectorStore(delay, seed=0),
+            max_concurrent_searches=1,
+            degrade_margin=DEGRADE_MARGIN,
+        )
+
+    return create
+
+
+def test_search_near_deadline_serves_lexical_results(search):
+    ns = search(delay=0.0)
+
+    results = ns.search_movies("dark knight", Deadline(DEGRADE_MARGIN / 2))
+
+    assert results == ns.lexical_search("dark knight")
+    assert results[:2] == ["The Dark Knight", "The Dark Knight Rises"]
+    assert ns.admission.stats() == {"shed": 0, "degraded": 1}
+
+
+def test_search_near_deadline_serves_cached_results(search):
+    ns = search(delay=0.0)
+
+    results = ns.search_movies("dark knight", Deadline(5.0))
+    assert ns.search_movies("dark knight", Deadline(DEGRADE_MARGIN / 2)) == results
+    assert ns.admission.stats()["degraded"] == 1
+
+
+def test_slow_search_skips_secondary_recommendations(search):
+    ns = search(delay=0.3)
+
+    similar_metadata_movies, similar_plot_movies = ns.recommend_movie_lists(
+        "Avatar", Deadline(DEGRADE_MARGIN + 0.2)
+    )
+
+    assert len(similar_metadata_movies) == 4
+    assert similar_plot_movies == []
+    assert ns.admission.stats() == {"shed": 0, "degraded": 1}
+
+
+def test_busy_search_slot_sheds_request(search):
+    ns = search(delay=0.0)
+
+    assert ns.admission.try_acquire("search")
+    with pytest.raises(Overloaded):
+        ns.recommend_movies("Avatar", "count", Deadline(DEGRADE_MARGIN + 0.1))
+    ns.admission.release("search")
+
+    assert ns.admission.stats()["shed"] == 1
+
+
+def test_no_deadline_waits_for_search_slot(search):
+    ns = search(delay=0.0)
+
+    assert ns.admission.try_acquire("search")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(ns.recommend_movies, "Avatar", "count")
+        time.sleep(0.2)
+        assert not future.done()
+        ns.admission.release("search")
+        assert len(future.result(timeout=1.0)) == 4
+
+
+def test_burst_is_shed_and_degraded(search):
+    ns = search(delay=0.2)
+
+    def request(i):
+        deadline = Deadline(0.5)
+        try:
+            ns.admission.admit(deadline)
+            if i % 2:
+                # Distinct queries, so degraded searches can't be served from cache
+                return ns.search_movies(f"knight {i}", deadline)
+            return ns.recommend_movie_lists("Titanic", deadline)
+        except Overloaded:
+            return None
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(request, range(20)))
+
+    stats = ns.admission.stats()
+    assert stats["shed"] > 0
+    assert stats["degraded"] > 0
+    assert ns.lexical_search("knight") in results[1::2]
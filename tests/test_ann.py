@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from neural_search.ann import IVFPQIndex
+from neural_search.vector_store import LocalVectorStore
+
+NLIST = 16
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(NLIST, 32))
+    labels = rng.integers(0, NLIST, 1000)
+    return (centers[labels] + 0.5 * rng.normal(size=(1000, 32))).astype(np.float32)
+
+
+@pytest.fixture
+def index(vectors):
+    index = IVFPQIndex(vectors.shape[1], nlist=NLIST, m=8)
+    index.train(vectors)
+    for start in range(0, len(vectors), 250):
+        index.add(vectors[start : start + 250])
+    return index
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_search(vectors, queries, k):
+    scores = normalize(queries) @ normalize(vectors).T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def recall(ids, exact):
+    return np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(ids, exact)])
+
+
+def test_exhaustive_search_with_rerank_is_exact(index, vectors):
+    queries = vectors[:50]
+    ids, _ = index.search(
+        queries, k=5, nprobe=NLIST, rerank_vectors=normalize(vectors), rerank_factor=200
+    )
+    assert recall(ids, exact_search(vectors, queries, 5)) == 1.0
+
+
+def test_recall_increases_with_nprobe(index, vectors):
+    queries = vectors[:100]
+    exact = exact_search(vectors, queries, 5)
+    recalls = [
+        recall(index.search(queries, k=5, nprobe=nprobe)[0], exact)
+        for nprobe in (1, 4, NLIST)
+    ]
+    assert recalls == sorted(recalls)
+    assert recalls[-1] > 0.5
+
+
+def test_save_and_load(index, vectors, tmp_path):
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = IVFPQIndex.load(path)
+
+    assert loaded.ntotal == index.ntotal
+    np.testing.assert_array_equal(
+        loaded.search(vectors[:10], k=5, nprobe=4)[0],
+        index.search(vectors[:10], k=5, nprobe=4)[0],
+    )
+
+
+def test_remove_ids(index, vectors):
+    removed = index.remove_ids([0, 1, 2])
+
+    assert removed == 3
+    assert index.ntotal == len(vectors) - 3
+    ids, _ = index.search(vectors[:3], k=5, nprobe=NLIST)
+    assert not set(ids.ravel()) & {0, 1, 2}
+
+
+def test_local_store_with_index(vectors, tmp_path):
+    store = LocalVectorStore(
+        path=str(tmp_path), index_type="ivfpq", index_params={"nlist": NLIST, "pq_m": 8}
+    )
+    store.upload("movies", vectors)
+
+    hits = store.search("movies", vectors[0], top=5, nprobe=NLIST, rerank_factor=200)
+    assert [hit.id for hit in hits] == exact_search(vectors, vectors[:1], 5)[0].tolist()
+
+    store.delete("movies", [0])
+    hits = store.search("movies", vectors[0], top=5, nprobe=NLIST, rerank_factor=200)
+    assert 0 not in [hit.id for hit in hits]
+    assert [hit.id for hit in store.filter("movies", {})][:2] == [1, 2]
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pytest
+
+from neural_search.batch import collect_space, export_space, write_recommendations
+
+SPACE = "plot"
+K = 5
+BLOCK_SIZE = 16
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    # A movie without an overview, i.e. a zero vector
+    vectors[10] = 0
+    return vectors
+
+
+def brute_force(vectors, k):
+    normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = normalized @ normalized.T
+    np.fill_diagonal(scores, -np.inf)
+    neighbours = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return neighbours, np.take_along_axis(scores, neighbours, axis=1)
+
+
+def export(vectors, checkpoint_dir, k=K, block_size=BLOCK_SIZE):
+    return export_space(SPACE, vectors, str(checkpoint_dir), k, block_size, workers=1)
+
+
+def test_export_matches_brute_force_top_k(vectors, tmp_path):
+    export(vectors, tmp_path)
+
+    neighbours, scores = collect_space(SPACE, len(vectors), str(tmp_path), BLOCK_SIZE)
+
+    expected_neighbours, expected_scores = brute_force(vectors, K)
+    rows = np.arange(len(vectors))[:, None]
+    assert not (neighbours == rows).any()
+    # The zero vector ties with every movie, so only its scores are compared
+    others = np.arange(len(vectors)) != 10
+    np.testing.assert_array_equal(neighbours[others], expected_neighbours[others])
+    np.testing.assert_allclose(scores, expected_scores, atol=1e-5)
+
+
+def test_export_resumes_after_deleted_block(vectors, tmp_path):
+    export(vectors, tmp_path)
+    expected = collect_space(SPACE, len(vectors), str(tmp_path), BLOCK_SIZE)
+    os.remove(tmp_path / f"{SPACE}_{BLOCK_SIZE:08d}.npz")
+
+    report = export(vectors, tmp_path)
+
+    assert report["blocks_computed"] == 1
+    assert report["blocks_resumed"] == 3
+    resumed = collect_space(SPACE, len(vectors), str(tmp_path), BLOCK_SIZE)
+    np.testing.assert_array_equal(resumed[0], expected[0])
+    np.testing.assert_array_equal(resumed[1], expected[1])
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"vectors": True},
+        {"k": K + 1},
+        {"block_size": BLOCK_SIZE * 2},
+    ],
+)
+def test_export_resets_checkpoints_when_inputs_change(vectors, tmp_path, change):
+    export(vectors, tmp_path)
+
+    changed = vectors.copy()
+    if change.pop("vectors", False):
+        changed[0] += 1
+    block_size = change.get("block_size", BLOCK_SIZE)
+
+    report = export(changed, tmp_path, **change)
+
+    assert report["blocks_resumed"] == 0
+    assert report["blocks_computed"] == -(-len(vectors) // block_size)
+    neighbours, _ = collect_space(SPACE, len(vectors), str(tmp_path), block_size)
+    expected, _ = brute_force(changed, change.get("k", K))
+    np.testing.assert_array_equal(neighbours[:10], expected[:10])
+
+
+def test_collect_space_rejects_other_movie_count_or_block_size(vectors, tmp_path):
+    export(vectors, tmp_path)
+
+    with pytest.raises(ValueError):
+        collect_space(SPACE, len(vectors) + 1, str(tmp_path), BLOCK_SIZE)
+    with pytest.raises(ValueError):
+        collect_space(SPACE, len(vectors), str(tmp_path), BLOCK_SIZE * 2)
+
+
+def test_collect_space_rejects_block_with_wrong_row_count(vectors, tmp_path):
+    export(vectors, tmp_path)
+    path = tmp_path / f"{SPACE}_{BLOCK_SIZE:08d}.npz"
+    with np.load(path) as block:
+        neighbours, scores = block["neighbours"][:-1], block["scores"][:-1]
+    np.savez(path, neighbours=neighbours, scores=scores)
+
+    with pytest.raises(ValueError, match="rows"):
+        collect_space(SPACE, len(vectors), str(tmp_path), BLOCK_SIZE)
+
+
+def test_write_recommendations(vectors, tmp_path):
+    titles = [f"movie {i}" for i in range(len(vectors))]
+    checkpoint_dir = tmp_path / "parts"
+    export(vectors, checkpoint_dir)
+    output_path = str(tmp_path / "recommendations.npz")
+
+    write_recommendations(output_path, titles, str(checkpoint_dir), [SPACE], BLOCK_SIZE)
+
+    with np.load(output_path) as output:
+        assert output["titles"].tolist() == titles
+        assert output[f"{SPACE}_neighbours"].shape == (len(vectors), K)
+        assert output[f"{SPACE}_scores"].shape == (len(vectors), K)
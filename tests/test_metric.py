@@ -0,0 +1,73 @@
+import numpy as np
+
+from neural_search.linalg import compute_row_norms
+from neural_search.metric import cosine_similarity_rows, load_title_vectors
+
+from conftest import TITLES, FakeModel
+
+
+def test_cosine_similarity_rows_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, 8))
+    vectors[4] = 0
+    vector = rng.normal(size=8)
+    rows = [0, 4, 7, 19]
+
+    similarities = cosine_similarity_rows(
+        vectors, compute_row_norms(vectors), rows, vector
+    )
+
+    expected = [
+        vectors[row] @ vector / (np.linalg.norm(vectors[row]) * np.linalg.norm(vector))
+        if row != 4
+        else 0.0
+        for row in rows
+    ]
+    np.testing.assert_allclose(similarities, expected)
+
+
+def test_cosine_similarity_rows_with_zero_query_vector():
+    vectors = np.eye(3)
+
+    similarities = cosine_similarity_rows(
+        vectors, compute_row_norms(vectors), [0, 2], np.zeros(3)
+    )
+
+    np.testing.assert_array_equal(similarities, [0.0, 0.0])
+
+
+class CountingModel(FakeModel):
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, sentences):
+        self.calls += 1
+        return super().encode(sentences)
+
+
+def test_load_title_vectors_is_cached_per_model_and_titles(tmp_path):
+    path = str(tmp_path / "titles.npz")
+    model = CountingModel()
+
+    vectors = load_title_vectors(model, TITLES, path=path, name="model-a")
+    cached = load_title_vectors(model, TITLES, path=path, name="model-a")
+
+    assert model.calls == 1
+    np.testing.assert_array_equal(cached, vectors)
+
+    load_title_vectors(model, TITLES, path=path, name="model-b")
+    assert model.calls == 2
+
+    load_title_vectors(model, TITLES[:3], path=path, name="model-b")
+    assert model.calls == 3
+
+
+def test_load_title_vectors_rebuilds_cache_without_model_name(tmp_path):
+    path = str(tmp_path / "titles.npz")
+    np.savez(path, titles=np.asarray(TITLES), vectors=np.zeros((len(TITLES), 3)))
+    model = CountingModel()
+
+    vectors = load_title_vectors(model, TITLES, path=path, name="model-a")
+
+    assert model.calls == 1
+    assert vectors.any()
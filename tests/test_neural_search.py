@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from neural_search.config import titles_coll_name, tfidf_coll_name, metadata_coll_name
+from neural_search.vector_store import LocalVectorStore
+
+from conftest import TITLES
+
+
+@pytest.fixture
+def ns(create_search, tmp_path):
+    return create_search(LocalVectorStore(path=str(tmp_path / "vectors"), index_type=None))
+
+
+@pytest.mark.parametrize("title", TITLES)
+@pytest.mark.parametrize("type", ["tfidf", "count"])
+def test_recommend_movies_excludes_the_movie_itself(ns, title, type):
+    recommendations = ns.recommend_movies(title, type)
+
+    assert title not in recommendations
+    assert len(recommendations) == 4
+
+
+def test_recommend_movies_keeps_the_identical_twin(ns):
+    # Both movies have the same Count vector, so either may be ranked first
+    assert ns.recommend_movies("The Dark Knight Rises", "count")[0] == "The Dark Knight"
+    assert ns.recommend_movies("The Dark Knight", "count")[0] == "The Dark Knight Rises"
+
+
+class SpyVectorStore(LocalVectorStore):
+    """
+    Local vector store which records the titles found per searched collection.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.searches = {}
+
+    def search(self, collection_name, query_vector, top, **kwargs):
+        hits = super().search(collection_name, query_vector, top, **kwargs)
+        self.searches[collection_name] = [hit.payload["title"] for hit in hits]
+        return hits
+
+
+@pytest.fixture
+def spy_search(create_search, tmp_path):
+    store = SpyVectorStore(path=str(tmp_path / "vectors"), index_type=None)
+    return create_search(store, blend_candidates=2), store
+
+
+def test_blended_candidates_are_the_union_of_the_spaces(spy_search):
+    ns, store = spy_search
+    title = "Inception"
+
+    recommendations = ns.recommend_movies_blended(title, n=len(TITLES))
+
+    assert set(store.searches) == {tfidf_coll_name, metadata_coll_name, titles_coll_name}
+    found = set().union(*store.searches.values()) - {title}
+    assert set(recommendations) == found
+    # With two candidates per space, no single space finds them all
+    assert all(len(set(titles) - {title}) < len(found) for titles in store.searches.values())
+
+
+def test_blended_zero_weight_drops_the_space(spy_search):
+    ns, store = spy_search
+
+    ns.recommend_movies_blended("Inception", {"title": 0}, n=len(TITLES))
+
+    assert set(store.searches) == {tfidf_coll_name, metadata_coll_name}
+
+
+@pytest.mark.parametrize("title", TITLES)
+def test_blended_excludes_the_movie_itself(ns, title):
+    recommendations = ns.recommend_movies_blended(title, n=len(TITLES))
+
+    assert title not in recommendations
+    assert len(recommendations) == len(TITLES) - 1
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [
+        {"plot": 1.0, "metadata": 1.0, "title": 0.5},
+        {"plot": 1.0, "metadata": 0.0, "title": 0.0},
+        {"plot": 0.1, "metadata": 2.0, "title": 3.0},
+    ],
+)
+def test_blended_ranks_by_weighted_cosine_similarity(ns, weights):
+    title = "The Dark Knight"
+    idx = TITLES.index(title)
+
+    def cosine(vectors, row):
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(vectors[idx])
+        return vectors[row] @ vectors[idx] / norms[row] if norms[row] else 0.0
+
+    expected = {
+        other: sum(
+            weight * cosine(ns.space_vectors[space], row)
+            for space, weight in weights.items()
+        )
+        for row, other in enumerate(TITLES)
+        if other != title
+    }
+
+    recommendations = ns.recommend_movies_blended(title, weights, n=len(TITLES))
+
+    scores = [expected[other] for other in recommendations]
+    assert scores == sorted(scores, reverse=True)
+    assert set(recommendations) == set(expected)
+
+
+def test_blended_weights_change_the_ranking(ns):
+    by_plot = ns.recommend_movies_blended("The Dark Knight", {"metadata": 0, "title": 0})
+    by_metadata = ns.recommend_movies_blended("The Dark Knight", {"plot": 0, "title": 0})
+
+    assert by_metadata[0] == "The Dark Knight Rises"
+    assert by_plot != by_metadata
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [{"plot": -1.0}, {"plot": float("inf")}, {"plot": float("nan")}, {"genre": 1.0}],
+)
+def test_blended_rejects_invalid_weights(ns, weights):
+    with pytest.raises(ValueError):
+        ns.recommend_movies_blended("The Dark Knight", weights)
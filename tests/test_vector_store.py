@@ -0,0 +1,114 @@
+"""
+Conformance tests which run the same cases against every VectorStore backend and
+check that they all return the exact (brute force) ranking, i.e. identical rankings.
+
+"""
+import numpy as np
+import pytest
+
+from neural_search.vector_store import LocalVectorStore
+
+COLLECTION = "movies"
+NO_MOVIES = 200
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(NO_MOVIES, 16)).astype(np.float32)
+    # Identical vectors, so that both backends have to break the tie by id
+    vectors[7] = vectors[3]
+    return vectors
+
+
+@pytest.fixture
+def payload():
+    return [{"title": f"movie {i}", "genre": i % 3} for i in range(NO_MOVIES)]
+
+
+def create_store(backend, tmp_path):
+    if backend == "local":
+        return LocalVectorStore(path=str(tmp_path), index_type=None)
+
+    qdrant_client = pytest.importorskip("qdrant_client")
+    from neural_search.qdrant_store import QdrantVectorStore
+
+    return QdrantVectorStore(qdrant_client.QdrantClient(":memory:"))
+
+
+@pytest.fixture(params=["local", "qdrant"])
+def store(request, tmp_path, vectors, payload):
+    store = create_store(request.param, tmp_path)
+    store.upload(COLLECTION, vectors, payload)
+    return store
+
+
+@pytest.fixture
+def stores(tmp_path, vectors, payload):
+    stores = [create_store(backend, tmp_path) for backend in ("local", "qdrant")]
+    for store in stores:
+        store.upload(COLLECTION, vectors, payload)
+    return stores
+
+
+def get_ids(hits):
+    return [hit.id for hit in hits]
+
+
+def exact_ranking(vectors, query, top, rows=None):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    order = np.lexsort((rows, -scores[rows]))
+    return rows[order][:top].tolist()
+
+
+def test_search(store, vectors):
+    for query in vectors[:20]:
+        expected = exact_ranking(vectors, query, 5)
+        assert get_ids(store.search(COLLECTION, query, top=5)) == expected
+
+
+def test_search_scores(stores, vectors):
+    local_hits, qdrant_hits = [
+        store.search(COLLECTION, vectors[0], top=5) for store in stores
+    ]
+    np.testing.assert_allclose(
+        [hit.score for hit in local_hits], [hit.score for hit in qdrant_hits], atol=1e-5
+    )
+
+
+def test_search_breaks_ties_by_id(store, vectors):
+    assert get_ids(store.search(COLLECTION, vectors[7], top=2)) == [3, 7]
+
+
+def test_search_batch(store, vectors):
+    queries = vectors[10:15]
+    results = store.search_batch(COLLECTION, queries, top=5)
+    assert [get_ids(hits) for hits in results] == [
+        exact_ranking(vectors, query, 5) for query in queries
+    ]
+
+
+def test_search_with_filter(store, vectors, payload):
+    rows = [i for i, entry in enumerate(payload) if entry["genre"] == 1]
+    hits = store.search(COLLECTION, vectors[0], top=5, query_filter={"genre": 1})
+    assert get_ids(hits) == exact_ranking(vectors, vectors[0], 5, rows)
+    assert all(hit.payload["genre"] == 1 for hit in hits)
+
+
+def test_filter(store, payload):
+    expected = [i for i, entry in enumerate(payload) if entry["genre"] == 2]
+    assert get_ids(store.filter(COLLECTION, {"genre": 2})) == expected
+    assert get_ids(store.filter(COLLECTION, {"title": "movie 42"})) == [42]
+
+
+def test_delete(store, vectors):
+    deleted = exact_ranking(vectors, vectors[0], 3)
+    rows = [i for i in range(NO_MOVIES) if i not in deleted]
+
+    store.delete(COLLECTION, deleted)
+
+    hits = store.search(COLLECTION, vectors[0], top=5)
+    assert get_ids(hits) == exact_ranking(vectors, vectors[0], 5, rows)
+    assert store.filter(COLLECTION, {"title": f"movie {deleted[0]}"}) == []